@@ -1,5 +1,5 @@
 import pygame as pg
-from typing import final
+from typing import Iterable, final
 
 from .windows_manager import WindowsManager
 from pysgui.util import SingletonMeta
@@ -7,6 +7,11 @@ from pysgui.styling import ThemeStore
 from pysgui.widgets import Window
 
 
+# Events never consumed by the GUI, or duplicating other events. They are dropped by SDL before reaching the queue.
+# WINDOWSHOWN is not blocked, as the screen must be repainted when it is received.
+DEFAULT_BLOCKED_EVENTS = (pg.ACTIVEEVENT, pg.AUDIODEVICEADDED, pg.AUDIODEVICEREMOVED, pg.TEXTEDITING, pg.WINDOWHIDDEN)
+
+
 @final
 class Application(metaclass=SingletonMeta):
     """
@@ -17,13 +22,16 @@ class Application(metaclass=SingletonMeta):
     """
     __instance = None
 
-    def __init__(self, title: str = "Application", size: tuple[int, int] = (800, 600), fps: int = 60, flags: int = 0, no_root : bool = False):
+    def __init__(self, title: str = "Application", size: tuple[int, int] = (800, 600), fps: int = 60, flags: int = 0, no_root : bool = False,
+                 blocked_events: Iterable[int] = DEFAULT_BLOCKED_EVENTS):
         """
         Create a new application instance.
         :param title: Title of the application window
         :param size: Size of the application window (width, height)
         :param fps: Maximum framerate of the application
         :param flags: Flags for the application window. Use pygame display flags.
+        :param blocked_events: Event types that are never received by the windows. Pass an empty tuple to receive all
+        events.
         """
 
         pg.init()
@@ -34,6 +42,11 @@ class Application(metaclass=SingletonMeta):
         self.fps = fps
         self._flags = flags
 
+        # Events are blocked before creating the display, which already posts some of them
+        blocked_events = list(blocked_events)
+        if blocked_events:
+            pg.event.set_blocked(blocked_events)
+
         self._screen = pg.display.set_mode(size, flags)
         pg.display.set_caption(title)
 
@@ -72,19 +85,35 @@ class Application(metaclass=SingletonMeta):
         """
         self.running = True
 
+        # Bind the functions called every frame to locals, to avoid looking them up on each call
+        tick = self._clock.tick
+        get_events = pg.event.get
+        handle_events = self._windows_manager.handle_events
+        update = self._windows_manager.update
+        draw = self._windows_manager.draw
+        get_screen_size = self._screen.get_size
+        flip = pg.display.flip
+        update_display = pg.display.update
+        quit_event = pg.QUIT
+
         while self.running:
-            dt = self._clock.tick(self.fps) / 1000.0
-
-            events = pg.event.get()
-            for event in events:
-                if event.type == pg.QUIT:
-                    self.quit()
-                    return
-                self._windows_manager.handle_event(event)
-
-            self._windows_manager.update(dt)
-            self._windows_manager.draw()
-            pg.display.flip()
+            dt = tick(self.fps) / 1000.0
+
+            # Quit events are fetched first, the other events are not handled when quitting
+            if get_events(quit_event):
+                self.quit()
+                return
+            handle_events(get_events())
+
+            update(dt)
+            dirty_rects = draw()
+
+            # Updating many rects is slower than a single flip, when they cover most of the screen
+            screen_width, screen_height = get_screen_size()
+            if sum(rect.w * rect.h for rect in dirty_rects) >= screen_width * screen_height:
+                flip()
+            else:
+                update_display(dirty_rects)
 
     @property
     def screen(self) -> pg.Surface:
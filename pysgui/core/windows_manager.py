@@ -1,7 +1,16 @@
+import bisect
+
 import pygame as pg
 
+from pysgui.util import KEYBOARD_EVENTS, MOUSE_EVENTS, blit_sequence, subtract_rects
 from pysgui.widgets import Window
 
+# Color of the screen areas not covered by opaque windows
+_BACKGROUND_COLOR = (0, 0, 0)
+
+# Events after which the content of the OS window may have been lost, so that the whole screen is updated
+_REPAINT_EVENTS = frozenset({pg.WINDOWEXPOSED, pg.WINDOWRESTORED, pg.WINDOWSHOWN})
+
 
 class WindowsManager:
     """
@@ -11,75 +20,195 @@ class WindowsManager:
 
     def __init__(self, screen: pg.Surface):
         self._screen = screen
-        self._windows: list[tuple[int, Window]] = []
+        self._screen_rect = screen.get_rect()
+
+        # Windows and their z-index are stored in parallel lists, sorted by z-index then by order of addition. The
+        # position of each window is indexed by its id.
+        self._z: list[int] = []
+        self._windows: list[Window] = []
+        self._index: dict[int, int] = {}
+
+        # Fullscreen windows, resized along with the screen
+        self._fullscreen_windows: list[Window] = []
+
+        # Window that received the last mouse button press
+        self._focused: Window | None = None
+
+        # Areas of the screen to update on the next draw, that are not tracked by the windows themselves
+        self._dirty_rects: list[pg.Rect] = []
 
     def add(self, window: Window, z_index: int = -1):
         """
         Add a window to the application.
         :param window: Window instance to be added
         :param z_index: The z-index of the window. Higher values are drawn on top of lower values. (Not implemented yet)
+        :raises ValueError: If the window is already in the application.
         """
+        if id(window) in self._index:
+            raise ValueError("Window already added to the application.")
+
         if window.fullscreen:
-            window.rect = self._screen.get_rect()
+            window.rect = self._screen_rect.copy()
+            self._fullscreen_windows.append(window)
 
         if z_index < 0:
             z_index = self.top_z + 1
 
-        self._windows.append((z_index, window))
-
-        self._sort_windows()
+        i = bisect.bisect_right(self._z, z_index)
+        self._z.insert(i, z_index)
+        self._windows.insert(i, window)
+        self._reindex(i)
 
     def bring_to_front(self, window: Window):
         """
         Bring a window to the front of the z-order.
         :param window: Window instance to be brought to the front
         """
-        if window not in [w for z, w in self._windows]:
+        i = self._index.get(id(window))
+        if i is None:
             raise ValueError("Window not found in the application.")
 
-        max_z = self.top_z
-        for i, (z, w) in enumerate(self._windows):
-            if w == window:
-                self._windows[i] = (max_z + 1, w)
-                break
+        if window.last_rect is not None:
+            self._dirty_rects.append(window.last_rect)
 
-        self._sort_windows()
+        max_z = self.top_z
+        del self._z[i]
+        del self._windows[i]
+        self._z.append(max_z + 1)
+        self._windows.append(window)
+        self._reindex(i)
 
-    def draw(self):
+    def draw(self) -> list[pg.Rect]:
         """
-        Draw all windows to the screen.
+        Draw all windows to the screen. Nothing is drawn if no area of the screen changed since the last draw, as the
+        screen still shows the last frame.
+        :return: The areas of the screen that changed since the last draw.
         """
+        dirty_rects = self._dirty_rects
+        self._dirty_rects = []
+        for window in self._windows:
+            dirty_rects.extend(window.damage())
+        if not dirty_rects:
+            return dirty_rects
+
         top_fs_index = 0
-        for i, (z, window) in enumerate(reversed(self._windows)):
+        for i, window in enumerate(reversed(self._windows)):
             if window.fullscreen and window.visible:
                 top_fs_index = len(self._windows) - 1 - i
                 break
 
-        for z, window in self._windows[top_fs_index:]:
-            window.draw(self._screen)
+        # Walk the windows top-down, to skip the ones fully covered by opaque windows above them. Windows with
+        # widgets or a custom draw are always drawn, as they may draw outside of their window.
+        windows = []
+        covering_rects = []
+        for window in reversed(self._windows[top_fs_index:]):
+            if window.visible:
+                if not window.widgets and not window.custom_draw and covering_rects:
+                    surface, pos = window.compose()
+                    rect = surface.get_rect(topleft=pos)
+                    if any(covering_rect.contains(rect) for covering_rect in covering_rects):
+                        continue
+
+                opaque_rect = window.opaque_rect
+                if opaque_rect is not None:
+                    covering_rects.append(opaque_rect)
+
+            windows.append(window)
+
+        # Only clear the areas of the screen that are not covered by opaque windows
+        for gap in subtract_rects(self._screen_rect, covering_rects):
+            self._screen.fill(_BACKGROUND_COLOR, gap)
+
+        # Consecutive windows are blitted in a single batch. The batch is flushed before drawing the widgets of a
+        # window, so that they stay under the windows above it.
+        sequence = []
+        for window in reversed(windows):
+            if not window.visible:
+                continue
+
+            if window.custom_draw:
+                blit_sequence(self._screen, sequence)
+                sequence = []
+                window.draw(self._screen)
+                continue
+
+            sequence.append(window.compose())
+            if window.widgets:
+                blit_sequence(self._screen, sequence)
+                sequence = []
+                window.draw_widgets(self._screen)
+
+        blit_sequence(self._screen, sequence)
+        return dirty_rects
+
+    @property
+    def focused(self) -> Window | None:
+        return self._focused
 
     def handle_event(self, event: pg.Event) -> bool:
         """
         Handle an event for all windows.
+        Mouse events are only sent to the topmost window under the pointer, and to the focused window when a mouse
+        button is released. Keyboard events are only sent to the focused window, if any.
+        Other events are sent to all windows from top to bottom, until one of them handles it.
         :param event: Pygame event to be handled
         :return: True if the event was handled by any window, False otherwise
         """
         if event.type == pg.VIDEORESIZE:
-            for z, window in self._windows:
-                if window.fullscreen:
-                    window.rect = self._screen.get_rect()
+            self._screen_rect = self._screen.get_rect()
+            self._dirty_rects.append(self._screen_rect.copy())
+            for window in self._fullscreen_windows:
+                window.rect = self._screen_rect.copy()
+        elif event.type in _REPAINT_EVENTS:
+            self._dirty_rects.append(self._screen_rect.copy())
+
+        if event.type in MOUSE_EVENTS:
+            return self._handle_mouse_event(event)
+
+        if event.type in KEYBOARD_EVENTS and self._focused is not None and self._focused.visible:
+            return self._focused.handle_event(event)
 
-        for z, window in reversed(self._windows):
+        for window in reversed(self._windows):
             if window.handle_event(event):
                 return True
         return False
 
+    def handle_events(self, events: list[pg.Event]):
+        """
+        Handle all the events of a frame, in order. See handle_event for how events are dispatched.
+        :param events: Pygame events to be handled
+        """
+        handle_event = self.handle_event
+        handle_mouse_event = self._handle_mouse_event
+        mouse_events = MOUSE_EVENTS
+
+        for event in events:
+            if event.type in mouse_events:
+                handle_mouse_event(event)
+            else:
+                handle_event(event)
+
     def remove(self, window: Window):
         """
-        Remove a window from the application.
+        Remove a window from the application. Nothing is done if the window is not in the application.
         :param window: Window instance to be removed
         """
-        self._windows = [(z, w) for (z, w) in self._windows if w != window]
+        i = self._index.pop(id(window), None)
+        if i is None:
+            return
+
+        if window.last_rect is not None:
+            self._dirty_rects.append(window.last_rect)
+
+        if window is self._focused:
+            self._focused = None
+
+        if window.fullscreen:
+            self._fullscreen_windows.remove(window)
+
+        del self._z[i]
+        del self._windows[i]
+        self._reindex(i)
 
     @property
     def screen(self):
@@ -91,14 +220,26 @@ class WindowsManager:
         :param only_visible: If True, only consider visible windows.
         :return: The topmost window or None if there are no windows.
         """
-        for z, window in reversed(self._windows):
+        for window in reversed(self._windows):
             if window.visible or not only_visible:
                 return window
         return None
 
+    def window_at(self, pos: tuple[int, int], only_visible: bool = True) -> Window | None:
+        """
+        Get the topmost window containing a position.
+        :param pos: Position on the screen.
+        :param only_visible: If True, only consider visible windows.
+        :return: The topmost window containing the position, or None if there is no such window.
+        """
+        for window in reversed(self._windows):
+            if (window.visible or not only_visible) and window.rect.collidepoint(pos):
+                return window
+        return None
+
     @property
     def top_z(self):
-        return self._windows[-1][0] if self._windows else 0
+        return self._z[-1] if self._z else 0
 
     def update(self, dt: float):
         """
@@ -109,12 +250,36 @@ class WindowsManager:
         pass
 
     @property
-    def windows(self):
-        return self._windows
+    def windows(self) -> list[tuple[int, Window]]:
+        return list(zip(self._z, self._windows))
+
+    def _handle_mouse_event(self, event: pg.Event) -> bool:
+        """
+        Send a mouse event to the topmost window under the pointer, and to the focused window on button release.
+        :param event: Pygame mouse event to be handled
+        :return: True if the event was handled by any window, False otherwise
+        """
+        # Mouse wheel events do not carry the pointer position
+        pos = pg.mouse.get_pos() if event.type == pg.MOUSEWHEEL else event.pos
+        target = self.window_at(pos)
+
+        if event.type == pg.MOUSEBUTTONDOWN:
+            self._focused = target
+
+        handled = target is not None and target.handle_event(event)
+
+        # The window where the button was pressed is notified of its release, even if the pointer left it
+        focused = self._focused
+        if event.type == pg.MOUSEBUTTONUP and focused is not None and focused is not target and focused.visible:
+            handled = focused.handle_event(event) or handled
+
+        return handled
 
-    def _sort_windows(self):
+    def _reindex(self, start: int):
         """
-        Sort windows by their z-index, then by their order of addition.
+        Update the position of the windows in the index, from the given position to the end.
+        :param start: position of the first window to update.
         :return:
         """
-        self._windows.sort(key=lambda item: item[0])
+        for i in range(start, len(self._windows)):
+            self._index[id(self._windows[i])] = i
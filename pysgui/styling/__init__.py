@@ -1,5 +1,5 @@
 from .colors import Color, COLORS, ColorType, parse_color
 from .stylable_mixin import StylableMixin
-from .style import Style
-from .theme import Theme
+from .style import DEFAULT_STYLE, Style, invalidate_font_cache, render_glyph
+from .theme import StateStyles, Theme
 from .theme_store import ThemeStore
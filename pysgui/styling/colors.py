@@ -1,46 +1,55 @@
+import functools
+
 from pygame import Color
 from pygame.colordict import THECOLORS as COLORS
 
 
-ColorType = str | Color | tuple[int, int, int, int] | tuple[int, int, int]
+ColorType = str | Color | tuple[int, int, int, int] | tuple[int, int, int] | list[int]
 
 
 def parse_color(value: ColorType) -> Color:
     """
-    Parse a color from a string, tuple, or pygame Color object.
-    Supports hex strings, RGB tuples, RGBA tuples, and color names.
+    Parse a color from a string, tuple, list, or pygame Color object.
+    Supports hex strings, RGB tuples, RGBA tuples, and color names. Lists are parsed like tuples, as theme files give
+    colors as arrays.
     :param value: The color to parse.
-    :return: A pygame Color object.
+    :return: A new pygame Color object, which is never the given object since colors are mutable.
     """
     if isinstance(value, Color):
-        return value
+        return Color(value)
     elif isinstance(value, str):
-        value = value.strip()
-        if value.startswith("#"):
-            # Hex string
-            hex_value = value.lstrip("#")
-            if len(hex_value) == 6:
-                r = int(hex_value[0:2], 16)
-                g = int(hex_value[2:4], 16)
-                b = int(hex_value[4:6], 16)
-                return Color(r, g, b)
-            elif len(hex_value) == 8:
-                r = int(hex_value[0:2], 16)
-                g = int(hex_value[2:4], 16)
-                b = int(hex_value[4:6], 16)
-                a = int(hex_value[6:8], 16)
-                return Color(r, g, b, a)
-            else:
-                raise ValueError(f"Invalid hex color string: {value}")
-        elif value.lower() in COLORS:
-            # Named color
-            return COLORS[value.lower()]
-        else:
-            raise ValueError(f"Unknown color name: {value}")
-    elif isinstance(value, tuple):
+        # Parsed strings are cached, a copy is returned since colors are mutable
+        return Color(_parse_color_string(value))
+    elif isinstance(value, (tuple, list)):
         if len(value) == 3 or len(value) == 4:
             return Color(*value)
         else:
-            raise ValueError(f"Invalid color tuple length: {len(value)}")
+            raise ValueError(f"Invalid color sequence length: {len(value)}")
     else:
         raise TypeError(f"Unsupported color type: {type(value)}")
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_color_string(value: str) -> Color:
+    """
+    Parse a color from a hex string or a color name.
+    :param value: The color to parse.
+    :return: A pygame Color object.
+    """
+    value = value.strip()
+    if value.startswith("#"):
+        # Hex string, decoded at once then split into components
+        hex_value = value.lstrip("#")
+        if len(hex_value) == 6:
+            v = int(hex_value, 16)
+            return Color((v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF)
+        elif len(hex_value) == 8:
+            v = int(hex_value, 16)
+            return Color((v >> 24) & 0xFF, (v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF)
+        else:
+            raise ValueError(f"Invalid hex color string: {value}")
+    elif value.lower() in COLORS:
+        # Named color
+        return Color(COLORS[value.lower()])
+    else:
+        raise ValueError(f"Unknown color name: {value}")
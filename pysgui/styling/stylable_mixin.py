@@ -1,9 +1,18 @@
+import sys
 from typing import Callable
 
 import pygame as pg
 
-from .style import Style
-from .theme_store import ThemeStore
+from .style import DEFAULT_STYLE, Style
+from .theme import StateStyles
+from .theme_store import ThemeStore, current_theme
+
+# Styles used while no theme is loaded
+_NO_THEME_STYLES = StateStyles(DEFAULT_STYLE, None, None, None, None)
+
+
+def _noop() -> None:
+    """Default style change callback, shared by all stylable objects."""
 
 
 class StylableMixin:
@@ -12,8 +21,8 @@ class StylableMixin:
     This mixin provides properties to access different styles based on the current theme and the state of the widget.
     Change the style of a widget by updating the style name or using the style property.
 
-    Registers to listen for style changes by setting the on_style_change callback.
-    Use the handle_event method to handle theme change events.
+    Registers to listen for style changes by setting the on_style_change callback, which is called directly by the
+    theme store when the current theme changes.
 
     Example::
 
@@ -35,38 +44,53 @@ class StylableMixin:
         # Revert to the style defined in the current theme
         widget.style = None
     """
+    __slots__ = ("__style_name", "__style", "_on_style_change", "__state_styles", "__resolved_version",
+                 "__weakref__")
 
-    def __init__(self, style_name: "str", on_style_change: Callable[[], None] = (lambda: None)):
-        self.__style_name: str = style_name
+    def __init__(self, style_name: "str", on_style_change: Callable[[], None] = _noop):
+        # Style names are interned, as they are used as keys of the theme styles
+        self.__style_name: str = sys.intern(style_name)
         self.__style: Style | None = None
         self._on_style_change = on_style_change
 
+        # Base and state styles of the style name in the current theme, for the given theme version
+        self.__state_styles: StateStyles = _NO_THEME_STYLES
+        self.__resolved_version: int | None = None
+
+        # Registered as a bound method, so that the store only holds a weak reference to this object
+        ThemeStore.register(self.__handle_theme_change)
+
     @property
     def active_style(self):
-        return self.__get_with_state("active")
+        style = self.__resolve().active
+        return style if style is not None else self.style
 
     @property
     def disabled_style(self):
-        return self.__get_with_state("disabled")
+        style = self.__resolve().disabled
+        return style if style is not None else self.style
 
     @property
     def focus_style(self):
-        return self.__get_with_state("focus")
+        style = self.__resolve().focus
+        return style if style is not None else self.style
 
     def handle_event(self, event: pg.Event) -> bool:
         """
-        Handle theme change events.
+        Handle theme change events posted by the application.
+        Theme changes made through ThemeStore.use are notified directly, without going through the event queue.
         :param event: event to test and handle.
         :return:
         """
-        if event.type == pg.USEREVENT and event.user_type == "theme_change":
+        if event.type == pg.USEREVENT and getattr(event, "user_type", None) == "theme_change":
             self._on_style_change()
             return True
         return False
 
     @property
     def hover_style(self):
-        return self.__get_with_state("hover")
+        style = self.__resolve().hover
+        return style if style is not None else self.style
 
     @property
     def on_style_change(self):
@@ -74,21 +98,62 @@ class StylableMixin:
 
     @property
     def style(self):
-        return self.__style or ThemeStore.current().get(self.style_name)
+        if self.__style is not None:
+            return self.__style
+        return self.__resolve().base
 
     @style.setter
     def style(self, value: Style | None):
         self.__style = value
         self._on_style_change()
 
+    def styles_for_state(self, hover: bool = False, active: bool = False, focus: bool = False,
+                         disabled: bool = False) -> Style:
+        """
+        Get the style to draw with, given the state of the object.
+        States are prioritized as follows: disabled, active, hover, focus.
+        :param hover: whether the object is hovered.
+        :param active: whether the object is active.
+        :param focus: whether the object has the focus.
+        :param disabled: whether the object is disabled.
+        :return: The style of the state with the highest priority, or the base style if no state is set
+        """
+        state_styles = self.__resolve()
+        if disabled:
+            style = state_styles.disabled
+        elif active:
+            style = state_styles.active
+        elif hover:
+            style = state_styles.hover
+        elif focus:
+            style = state_styles.focus
+        else:
+            style = None
+        return style if style is not None else self.style
+
     @property
     def style_name(self):
         return self.__style_name
 
     @style_name.setter
     def style_name(self, value: str):
-        self.__style_name = value
+        self.__style_name = sys.intern(value)
+        self.__resolved_version = None
+        self._on_style_change()
+
+    def __handle_theme_change(self) -> None:
         self._on_style_change()
 
-    def __get_with_state(self, state: str) -> Style:
-        return ThemeStore.current().get(f"{self.style_name}:{state}", self.style)
+    def __resolve(self) -> StateStyles:
+        """
+        Get the base and state styles from the current theme, or from the cache if the theme did not change since the
+        last call. The styles of DEFAULT_STYLE are used while no theme is loaded.
+        :return: The resolved styles. States the theme does not define are None.
+        """
+        theme = current_theme()
+        if theme is None:
+            return _NO_THEME_STYLES
+        if theme.version != self.__resolved_version:
+            self.__state_styles = theme.state_styles_for(self.__style_name)
+            self.__resolved_version = theme.version
+        return self.__state_styles
@@ -1,12 +1,76 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, replace
+import functools
 
 import pygame as pg
 
-from .colors import ColorType
+from .colors import ColorType, parse_color
 
 
-@dataclass(frozen=True)
+# Names of the system fonts, loaded on first use as listing them is slow
+_system_fonts: frozenset[str] | None = None
+
+
+def _get_system_fonts() -> frozenset[str]:
+    """
+    Get the names of the system fonts. The names are only listed once.
+    :return: The names of the system fonts.
+    """
+    global _system_fonts
+    if _system_fonts is None:
+        _system_fonts = frozenset(pg.font.get_fonts())
+    return _system_fonts
+
+
+# Incremented by invalidate_font_cache, so that styles drop the fonts they hold
+_font_generation = 0
+
+# Fields of Style holding a color, parsed into pygame colors on construction
+_COLOR_FIELDS = ("background_color", "border_color", "foreground_color", "secondary_background_color",
+                 "secondary_border_color", "secondary_foreground_color", "shadow_color")
+
+
+@functools.lru_cache(maxsize=128)
+def _load_font(name: str, size: int) -> pg.Font:
+    """
+    Load a font, either a system font or a font file. Fonts are cached, so each font is only loaded once.
+    :param name: Name of the system font, or path to the font file.
+    :param size: Size of the font.
+    :return: The loaded font.
+    """
+    # System font names are listed lowercase and without spaces, as SysFont normalizes the names it is given
+    if name.lower().replace(" ", "") in _get_system_fonts():
+        return pg.font.SysFont(name, size)
+    else:
+        return pg.font.Font(name, size)
+
+
+@functools.lru_cache(maxsize=1024)
+def render_glyph(font: pg.Font, char: str, color: tuple[int, ...]) -> pg.Surface:
+    """
+    Render a single character. Glyphs are cached, so that texts which change often can be drawn from them without
+    being rendered. The least recently used glyphs are dropped first.
+    :param font: font to render the glyph with.
+    :param char: character to render.
+    :param color: color of the glyph, as a tuple since pygame colors are not hashable.
+    :return: The rendered glyph. Its width is the advance to the next glyph.
+    """
+    return font.render(char, True, color)
+
+
+def invalidate_font_cache() -> None:
+    """
+    Forget the system font names, the loaded fonts and the glyphs rendered with them, e.g. after pygame.font was
+    re-initialized or fonts were installed. They are loaded again on next use.
+    """
+    global _system_fonts, _font_generation
+    _system_fonts = None
+    _font_generation += 1
+    _load_font.cache_clear()
+    render_glyph.cache_clear()
+
+
+@dataclass(frozen=True, slots=True)
 class Style:
     """
     A class for storing a variety of styles.
@@ -29,24 +93,49 @@ class Style:
     secondary_font_name: str = "Arial"
     secondary_font_size: int = 14
     secondary_foreground_color: ColorType = (0, 0, 0, 255)
+    shadow_blur: int = 0
     shadow_color: ColorType = (0, 0, 0, 100)
     shadow_offset: tuple[int, int] = (0, 0)
 
+    # Background color, border color, border radius and border width, read together by most draw calls
+    draw_pack: tuple[pg.Color, pg.Color, int, int] = field(init=False, repr=False, compare=False)
+    # Font generation, primary font and secondary font, loaded on first use
+    _fonts: list = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # The style is frozen, so attributes are set through object.__setattr__
+        for name in _COLOR_FIELDS:
+            object.__setattr__(self, name, parse_color(getattr(self, name)))
+        object.__setattr__(self, "shadow_offset", (int(self.shadow_offset[0]), int(self.shadow_offset[1])))
+        object.__setattr__(self, "draw_pack",
+                           (self.background_color, self.border_color, self.border_radius, self.border_width))
+        object.__setattr__(self, "_fonts", [_font_generation, None, None])
+
+    def __hash__(self):
+        # Colors are mutable, so the generated hash would fail on them. They are hashed as tuples instead, which
+        # hash the same for equal colors.
+        return hash(tuple(tuple(value) if isinstance(value, pg.Color) else value
+                          for value in (getattr(self, name) for name in _HASHED_FIELDS)))
+
     def font(self, secondary: bool = False) -> pg.Font:
         """
         Get the font name and size.
         :param secondary: If True, get the secondary font.
         :return: A tuple containing the font name and size.
         """
-        def get_font(name: str, size: int) -> pg.Font:
-            if name in pg.font.get_fonts():
-                return pg.font.SysFont(name, size)
-            else:
-                return pg.font.Font(name, size)
+        fonts = self._fonts
+        if fonts[0] != _font_generation:
+            fonts[:] = (_font_generation, None, None)
 
-        if secondary:
-            return get_font(self.secondary_font_name, self.secondary_font_size)
-        return get_font(self.font_name, self.font_size)
+        index = 2 if secondary else 1
+        font = fonts[index]
+        if font is None:
+            if secondary:
+                font = _load_font(self.secondary_font_name, self.secondary_font_size)
+            else:
+                font = _load_font(self.font_name, self.font_size)
+            fonts[index] = font
+        return font
 
     def clone(self, **kwargs) -> Style:
         """
@@ -54,4 +143,11 @@ class Style:
         :param kwargs: Attributes to replace.
         :return: A new Style object with the replaced attributes.
         """
-        return Style(**{**self.__dict__, **kwargs})
\ No newline at end of file
+        return replace(self, **kwargs)
+
+
+# Fields compared by Style.__eq__, and hashed by Style.__hash__
+_HASHED_FIELDS = tuple(f.name for f in fields(Style) if f.compare)
+
+# Style used when no theme provides one, so that style lookups always return a Style
+DEFAULT_STYLE = Style()
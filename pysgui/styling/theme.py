@@ -1,22 +1,100 @@
-from .style import Style
+import itertools
+import sys
+from types import MappingProxyType
+from typing import Callable, Iterable, NamedTuple
+
+from .style import DEFAULT_STYLE, Style
+
+
+# Versions are unique across all themes, so that a version identifies both a theme and the state of its styles
+_versions = itertools.count()
+
+_NO_STATES: dict[str, str] = {}
+
+
+class StateStyles(NamedTuple):
+    """
+    The base style of a style name, and its state styles. States without a style are None.
+    """
+    base: Style
+    hover: Style | None
+    active: Style | None
+    focus: Style | None
+    disabled: Style | None
 
 
 class Theme:
 
-    def __init__(self, name: str, styles: dict[str, Style] = None, variables: dict = None, root_stylename: str = None):
+    def __init__(self, name: str, styles: dict[str, Style] = None, variables: dict = None, root_stylename: str = None,
+                 lazy_style_names: Iterable[str] = (), resolve_style: Callable[[str], Style] | None = None):
+        """
+        :param name: Name of the theme
+        :param styles: Resolved styles, by name
+        :param variables: Variables of the theme, by name
+        :param root_stylename: Name of the style used as fallback for unknown style names
+        :param lazy_style_names: Names of the styles which are only resolved when first used, with resolve_style
+        :param resolve_style: Function resolving a style by name, required if lazy_style_names is not empty
+        """
         self.__name: str = name
-        self.__styles: dict[str, Style] = styles or {}
+        # Style names are interned, like the style names of stylable objects, so that lookups compare identities
+        self.__styles: dict[str, Style] = {sys.intern(key): style for key, style in styles.items()} if styles else {}
         self.__variables: dict = variables or {}
         self.__root_stylename = root_stylename
+        self.__version: int = next(_versions)
+
+        # Styles not resolved yet. A dict is used as an ordered set
+        self.__lazy: dict[str, None] = dict.fromkeys(map(sys.intern, lazy_style_names))
+        self.__resolve_style = resolve_style
+
+        # State style names ("name:state") indexed by base style name, then by state
+        self.__states: dict[str, dict[str, str]] = {}
+        # Base and state styles by style name, built on first request
+        self.__state_styles: dict[str, StateStyles] = {}
+        for style_name in itertools.chain(self.__styles, self.__lazy):
+            self.__add_state(style_name)
+
+        # The root style is the fallback of every lookup, so it is fetched once
+        self.__root_style: Style = DEFAULT_STYLE
+        self.__root_style = self.get(root_stylename)
 
     def get(self, name: str, default: Style | None = None) -> Style:
         """
         Get a style by name.
         :param name: Name of the style
-        :param default: Default value to return if the style is not found
+        :param default: Default value to return if the style is not found. Defaults to the root style, or to
+            DEFAULT_STYLE if the theme has no root style.
+        :return: Style object
+        """
+        style = self.__styles.get(name)
+        if style is not None:
+            return style
+        if name in self.__lazy:
+            return self.__resolve(name)
+        return default if default is not None else self.__root_style
+
+    def get_state(self, name: str, state: str, default: Style | None = None) -> Style | None:
+        """
+        Get the style of a given state (e.g. "hover") for a style name. It is the style named "name:state".
+        :param name: Name of the base style
+        :param state: Name of the state
+        :param default: Default value to return if the style has no such state
         :return: Style object
         """
-        return self.__styles.get(name, default or self.__styles.get(self.__root_stylename))
+        style_name = self.__states.get(name, _NO_STATES).get(state)
+        return self.get(style_name) if style_name is not None else default
+
+    def state_styles_for(self, name: str) -> StateStyles:
+        """
+        Get the base style and the state styles of a style name at once.
+        :param name: Name of the base style
+        :return: The styles, states the theme does not define being None
+        """
+        state_styles = self.__state_styles.get(name)
+        if state_styles is None:
+            state_styles = StateStyles(self.get(name), self.get_state(name, "hover"), self.get_state(name, "active"),
+                                       self.get_state(name, "focus"), self.get_state(name, "disabled"))
+            self.__state_styles[name] = state_styles
+        return state_styles
 
     def get_variable(self, name: str, default=None):
         """
@@ -31,13 +109,33 @@ class Theme:
     def name(self) -> str:
         return self.__name
 
+    def resolve_styles(self) -> None:
+        """
+        Resolve all the styles which are not resolved yet.
+        """
+        for name in list(self.__lazy):
+            self.__resolve(name)
+
     def set_style(self, name: str, style: Style) -> None:
         """
-        Set a style by name.
+        Set a style by name. If the theme is the current theme, the stylable objects are notified as if the theme
+        changed, so that they draw with the new style.
         :param name: Name of the style
         :param style: Style object
         """
-        self.styles[name] = style
+        name = sys.intern(name)
+        self.__styles[name] = style
+        self.__lazy.pop(name, None)
+        self.__add_state(name)
+        self.__state_styles.clear()
+        if name == self.__root_stylename:
+            self.__root_style = style
+        self.__version = next(_versions)
+
+        # Imported here, as the theme store depends on this module
+        from .theme_store import _notify_listeners, current_theme
+        if current_theme() is self:
+            _notify_listeners()
 
     def set_variable(self, name: str, value) -> None:
         """
@@ -46,14 +144,27 @@ class Theme:
         :param value: Variable value
         """
         self.variables[name] = value
+        self.__version = next(_versions)
 
     @property
     def styles(self):
-        return self.__styles
+        """
+        Read-only view of the styles, by name. Use set_style to add or replace a style.
+        All the styles are resolved.
+        """
+        self.resolve_styles()
+        return MappingProxyType(self.__styles)
 
     @property
     def style_names(self):
-        return list(self.__styles.keys())
+        return [*self.__styles, *self.__lazy]
+
+    @property
+    def version(self) -> int:
+        """
+        Version of the theme, changed whenever a style or a variable is set. Versions are unique across all themes.
+        """
+        return self.__version
 
     @property
     def variables(self):
@@ -62,3 +173,21 @@ class Theme:
     @property
     def variable_names(self):
         return list(self.__variables.keys())
+
+    def __add_state(self, name: str) -> None:
+        """
+        Index a style name in the state table, if it is a state style name ("name:state").
+        States are interned, as they are looked up with the interned literals used by stylable objects.
+        """
+        base_name, separator, state = name.rpartition(":")
+        if separator:
+            self.__states.setdefault(base_name, {})[sys.intern(state)] = name
+
+    def __resolve(self, name: str) -> Style:
+        """
+        Resolve a lazy style, and keep it with the resolved styles.
+        """
+        style = self.__resolve_style(name)
+        self.__styles[name] = style
+        del self.__lazy[name]
+        return style
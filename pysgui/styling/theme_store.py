@@ -1,12 +1,79 @@
+import inspect
 import json
+import os
+import sys
+from typing import Callable
+import weakref
 
 from .style import Style
 from .theme import Theme
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# The state of the store is kept at module level, so that reading the current theme is a single global lookup
+_store: dict[str, Theme] = {}
+_current: Theme | None = None
+# Themes loaded from files, with the modification time of the file and the version of the theme when loaded
+_loaded: dict[str, tuple[float, Theme, int]] = {}
+# Callbacks called when the current theme changes, by callback key, see _listener_key. Each callback is stored as a
+# weak reference to the callback, or to its object for bound methods, and the function to call it with (None for
+# callbacks which are not bound methods).
+_listeners: dict[object, tuple[weakref.KeyedRef, Callable | None]] = {}
+
+
+def current_theme() -> Theme:
+    """
+    Get the current theme. Same as ThemeStore.current, for hot paths.
+    :return: The current theme
+    """
+    return _current
+
+
+def _listener_key(callback: Callable[[], None]) -> object:
+    """
+    Get the key of a callback in _listeners. Bound methods are created again on each attribute access, so they are
+    identified by their object and function.
+    :param callback: Function or bound method
+    :return: The key of the callback
+    """
+    if inspect.ismethod(callback):
+        return id(callback.__self__), callback.__func__
+    return id(callback)
+
+
+def _notify_listeners() -> None:
+    """
+    Call the callbacks registered with ThemeStore.register.
+    """
+    # Iterate over a copy, as callbacks may register new listeners
+    for ref, function in list(_listeners.values()):
+        target = ref()
+        if target is None:
+            continue
+        if function is None:
+            target()
+        else:
+            function(target)
+
+
+def _forget_listener(ref: weakref.KeyedRef) -> None:
+    """
+    Remove a listener once its callback, or the object it is bound to, is garbage collected. Shared by all listeners,
+    which find their key in their reference.
+    :param ref: The dead reference
+    """
+    # The key may have been registered again since, with a new reference
+    entry = _listeners.get(ref.key)
+    if entry is not None and entry[0] is ref:
+        del _listeners[ref.key]
+
 
 class ThemeStore:
-    __store: dict[str, Theme] = {}
-    __current: Theme
 
     @staticmethod
     def add(theme: Theme) -> Theme:
@@ -15,7 +82,7 @@ class ThemeStore:
         :param theme: Theme object to add
         :return: The new theme object
         """
-        ThemeStore.__store[theme.name] = theme
+        _store[sys.intern(theme.name)] = theme
         return theme
 
     @staticmethod
@@ -24,7 +91,7 @@ class ThemeStore:
         Get the current theme.
         :return: The current theme
         """
-        return ThemeStore.__current
+        return _current
 
     @staticmethod
     def get_current_name() -> str:
@@ -32,7 +99,7 @@ class ThemeStore:
         Get the name of the current theme.
         :return: Name of the current theme
         """
-        return ThemeStore.__current.name
+        return _current.name
 
     @staticmethod
     def get(name: str, default: Theme = None) -> Theme:
@@ -43,10 +110,10 @@ class ThemeStore:
         :return: Theme object
         :raises KeyError: If the theme is not found and no default value is provided
         """
-        if default is None and name not in ThemeStore.__store:
+        if default is None and name not in _store:
             raise KeyError(f"Theme '{name}' not found.")
 
-        return ThemeStore.__store.get(name, default)
+        return _store.get(name, default)
 
     @staticmethod
     def get_theme_names() -> list[str]:
@@ -54,23 +121,35 @@ class ThemeStore:
         Get the names of all available themes.
         :return: List of theme names
         """
-        return list(ThemeStore.__store.keys())
+        return list(_store.keys())
 
     @staticmethod
     def load_default_themes() -> None:
         """
         Load the default themes.
         """
+        global _current
         default_theme = ThemeStore.load_theme("assets/themes/light.json")
-        ThemeStore.__current = ThemeStore.get(default_theme.name)
+        _current = ThemeStore.get(default_theme.name)
 
     @staticmethod
-    def load_theme(path: str) -> Theme:
+    def load_theme(path: str, lazy: bool = True) -> Theme:
         """
         Load a theme from a file.
+        A theme file is only parsed again if it was modified since it was last loaded, or if the theme loaded from it was
+        changed with Theme.set_style or Theme.set_variable since, so that a fresh theme is returned.
         :param path: Path to the theme file
+        :param lazy: If True, styles are only resolved when first used, and unknown variables are reported then.
+            If False, all the styles are resolved on load.
         :return: The loaded theme
         """
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime
+        loaded = _loaded.get(path)
+        if loaded is not None and loaded[0] == mtime and loaded[1].version == loaded[2]:
+            if not lazy:
+                loaded[1].resolve_styles()
+            return ThemeStore.add(loaded[1])
 
         def resolve_variable(value):
             """Resolve if the value is a variable."""
@@ -81,8 +160,9 @@ class ThemeStore:
                 return variables[var_name]
             return value
 
-        with open(path) as file:
-            data = json.load(file)
+        # orjson is used to parse the file when available, json accepts bytes as well
+        with open(path, "rb") as file:
+            data = _loads(file.read())
 
         try:
             theme_name = data["name"]
@@ -96,37 +176,79 @@ class ThemeStore:
         if root_name is not None and root_name not in json_styles:
             raise ValueError(f"Root style '{root_name}' not found in theme styles.")
 
-        cache: dict[str, Style] = {}
-
-        def resolve_style(name: str) -> Style:
-            """Resolve a style by name, using cache to avoid re-computation."""
-            if name in cache:
-                return cache[name]
-
-            resolved_style = {key: resolve_variable(value) for key, value in json_styles[name].items()}
-
-            if '>' in name:
-                parent_name = '>'.join(name.split('>')[:-1])
+        # Parent of each style: the name up to the last '>' for nested styles, the root style for top-level ones
+        parents: dict[str, str | None] = {}
+        for name in json_styles:
+            # Style names become the keys of the theme styles, which are looked up on every style resolution
+            name = sys.intern(name)
+            head, separator, _ = name.rpartition('>')
+            if separator:
+                parent_name = head or None
             elif name != root_name:
                 parent_name = root_name
             else:
                 parent_name = None
 
-            if parent_name:
-                if parent_name not in json_styles and parent_name not in cache:
-                    raise ValueError(f"Parent style '{parent_name}' not found for style '{name}'.")
-                parent_style = resolve_style(parent_name)
-                merged = {**parent_style.__dict__, **resolved_style}
+            if parent_name is not None and parent_name not in json_styles:
+                raise ValueError(f"Parent style '{parent_name}' not found for style '{name}'.")
+            parents[name] = parent_name
+
+        # Order the styles so that parents always come before their children (Kahn's algorithm)
+        children: dict[str, list[str]] = {}
+        order = []
+        for name, parent_name in parents.items():
+            if parent_name is None:
+                order.append(name)
             else:
-                merged = resolved_style
+                children.setdefault(parent_name, []).append(name)
+        for name in order:
+            order.extend(children.get(name, ()))
+        if len(order) != len(parents):
+            cyclic = sorted(set(parents) - set(order))
+            raise ValueError(f"Cyclic style inheritance between styles {cyclic}.")
 
-            style = Style(**merged)
-            cache[name] = style
-            return style
+        # Children merge onto the already merged field values of their parent
+        merged: dict[str, dict] = {}
 
-        styles = {name: resolve_style(name) for name in json_styles.keys()}
+        def resolve_style(name: str) -> Style:
+            """Resolve a style by name, merging first those of its ancestors which are not merged yet."""
+            chain = []
+            ancestor = name
+            while ancestor is not None and ancestor not in merged:
+                chain.append(ancestor)
+                ancestor = parents[ancestor]
 
-        return ThemeStore.add(Theme(theme_name, styles, variables, root_name))
+            for ancestor in reversed(chain):
+                values = {sys.intern(key): resolve_variable(value) for key, value in json_styles[ancestor].items()}
+                parent_name = parents[ancestor]
+                if parent_name is not None:
+                    values = {**merged[parent_name], **values}
+                merged[ancestor] = values
+            return Style(**merged[name])
+
+        if lazy:
+            theme = Theme(theme_name, None, variables, root_name, parents.keys(), resolve_style)
+        else:
+            resolved = {name: resolve_style(name) for name in order}
+            styles = {name: resolved[name] for name in parents}
+            theme = Theme(theme_name, styles, variables, root_name)
+        _loaded[path] = (mtime, theme, theme.version)
+        return ThemeStore.add(theme)
+
+    @staticmethod
+    def register(callback: Callable[[], None]) -> None:
+        """
+        Register a callback called when the current theme changes.
+        The callback is weakly referenced: it is unregistered automatically once it (or the object it is bound to) is
+        garbage collected.
+        :param callback: Function or bound method to call
+        """
+        key = _listener_key(callback)
+        # Bound methods are called through their function, as the method object itself dies immediately
+        if inspect.ismethod(callback):
+            _listeners[key] = (weakref.KeyedRef(callback.__self__, _forget_listener, key), callback.__func__)
+        else:
+            _listeners[key] = (weakref.KeyedRef(callback, _forget_listener, key), None)
 
     @staticmethod
     def remove(name: str) -> None:
@@ -135,13 +257,24 @@ class ThemeStore:
         :param name: Name of the theme to remove
         :raises KeyError: If the theme is not found
         """
-        del ThemeStore.__store[name]
+        del _store[name]
+
+    @staticmethod
+    def unregister(callback: Callable[[], None]) -> None:
+        """
+        Unregister a callback previously registered with ThemeStore.register.
+        :param callback: Function or bound method to unregister
+        """
+        _listeners.pop(_listener_key(callback), None)
 
     @staticmethod
     def use(name: str) -> None:
         """
         Set the current theme by name.
+        Calls the registered callbacks, so that stylable objects update their appearance.
         :param name: Name of the theme to set as current
         :raises KeyError: If the theme is not found
         """
-        ThemeStore.__current = ThemeStore.get(name)
+        global _current
+        _current = ThemeStore.get(name)
+        _notify_listeners()
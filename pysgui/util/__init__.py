@@ -1,2 +1,6 @@
+from .blits import blit_sequence
 from .constraints import Align, Constraints, Policy
+from .events import KEYBOARD_EVENTS, MOUSE_EVENTS
+from .rects import subtract_rects
 from .singleton import SingletonMeta
+from .surfaces import alpha_surface
@@ -0,0 +1,21 @@
+import pygame as pg
+
+
+# Surface.fblits is only available in recent pygame-ce versions
+_HAS_FBLITS = hasattr(pg.Surface, "fblits")
+
+
+def blit_sequence(surface: pg.Surface, sequence: list[tuple[pg.Surface, tuple[int, int]]]):
+    """
+    Blit a sequence of (surface, position) pairs onto a surface, with a single call.
+    :param surface: surface to blit onto.
+    :param sequence: pairs to blit, in drawing order.
+    :return:
+    """
+    if not sequence:
+        return
+
+    if _HAS_FBLITS:
+        surface.fblits(sequence)
+    else:
+        surface.blits(sequence, doreturn=False)
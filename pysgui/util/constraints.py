@@ -14,15 +14,17 @@ class Policy(Enum):
     SHRINK = 'shrink'
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Constraints:
     """A class representing layout constraints for GUI elements.
+    Maximum sizes set to None are unbounded.
+    Constraints are immutable and hashable: use dataclasses.replace to derive new constraints.
     """
 
     min_w: int = 0
     min_h: int = 0
-    max_w: int = float('inf')
-    max_h: int = float('inf')
+    max_w: int | None = None
+    max_h: int | None = None
     pref_w: int | None = None
     pref_h: int | None = None
     halign: Align = Align.START
@@ -0,0 +1,6 @@
+import pygame as pg
+
+
+# Mouse events are sent to the element under the pointer, keyboard events to the focused element
+MOUSE_EVENTS = frozenset((pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP, pg.MOUSEWHEEL))
+KEYBOARD_EVENTS = frozenset((pg.KEYDOWN, pg.KEYUP, pg.TEXTINPUT))
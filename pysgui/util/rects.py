@@ -0,0 +1,30 @@
+import pygame as pg
+
+
+def subtract_rects(rect: pg.Rect, holes: list[pg.Rect]) -> list[pg.Rect]:
+    """
+    Get the parts of a rect that are not covered by any of the given holes.
+    :param rect: rect to subtract the holes from.
+    :param holes: rects to subtract.
+    :return: A list of non-overlapping rects covering the remaining area.
+    """
+    remaining = [rect]
+    for hole in holes:
+        parts = []
+        for part in remaining:
+            clipped = part.clip(hole)
+            if not clipped:
+                parts.append(part)
+                continue
+
+            # Strips above and below the hole, then on its left and right
+            if clipped.top > part.top:
+                parts.append(pg.Rect(part.left, part.top, part.width, clipped.top - part.top))
+            if clipped.bottom < part.bottom:
+                parts.append(pg.Rect(part.left, clipped.bottom, part.width, part.bottom - clipped.bottom))
+            if clipped.left > part.left:
+                parts.append(pg.Rect(part.left, clipped.top, clipped.left - part.left, clipped.height))
+            if clipped.right < part.right:
+                parts.append(pg.Rect(clipped.right, clipped.top, part.right - clipped.right, clipped.height))
+        remaining = parts
+    return remaining
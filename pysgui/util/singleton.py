@@ -1,9 +1,19 @@
+import threading
+
+
 class SingletonMeta(type):
 
     _instances = {}
+    _lock = threading.RLock()
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            instance = super().__call__(*args, **kwargs)
-            cls._instances[cls] = instance
+        # Once the instance exists, it is returned without taking the lock
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
+        with cls._lock:
+            if cls not in cls._instances:
+                instance = super().__call__(*args, **kwargs)
+                cls._instances[cls] = instance
         return cls._instances[cls]
@@ -0,0 +1,14 @@
+import pygame as pg
+
+
+def alpha_surface(size: tuple[int, int]) -> pg.Surface:
+    """
+    Create a transparent surface with per-pixel alpha.
+    Once the display is set, the surface uses the pixel format of the display, so that blitting it needs no conversion.
+    :param size: size of the surface.
+    :return: The new surface.
+    """
+    surface = pg.Surface(size, pg.SRCALPHA)
+    if pg.display.get_surface() is not None:
+        return surface.convert_alpha()
+    return surface
@@ -14,13 +14,6 @@ class Container(Widget):
         self._children: list[Widget] = []
         self._layout = layout
 
-        def on_size_change(_1: tuple[int, int], _2: tuple[int, int]):
-            self.apply_layout()
-            self.rebuild()
-
-        self._on_size_change = on_size_change
-        self._on_style_change = self.rebuild
-
         self.apply_layout()
 
     def add(self, widget: Widget) -> Widget:
@@ -67,5 +60,13 @@ class Container(Widget):
         self.apply_layout()
 
     def set_geometry(self, rect: pg.Rect):
+        old_size = self._rect.size
         super().set_geometry(rect)
+
+        # On size change, the layout was already applied by _handle_size_change
+        if old_size == self._rect.size:
+            self.apply_layout()
+
+    def _handle_size_change(self, _1: tuple[int, int], _2: tuple[int, int]):
         self.apply_layout()
+        self.rebuild()
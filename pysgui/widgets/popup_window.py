@@ -1,68 +1,278 @@
+from collections import OrderedDict
+
 import pygame as pg
 
+from pysgui.styling import Style, render_glyph
+from pysgui.util import alpha_surface, blit_sequence
 from .window import Window
 
 
+# Maximum number of pixels of the surfaces held by the PopupWindow surface cache, about 16 MB
+_SURFACE_CACHE_PIXELS = 1 << 22
+
+
+def _draw_glyphs(surface: pg.Surface, font: pg.Font, text: str, color: pg.Color, pos: tuple[int, int]):
+    """
+    Draw a text glyph by glyph, with a single blit call, to draw texts which change often without rendering them.
+    Texts drawn from glyphs are not kerned, so this is only used for titles flagged as dynamic.
+    :param surface: surface to draw on.
+    :param font: font of the text.
+    :param text: text to draw.
+    :param color: color of the text.
+    :param pos: position of the top left corner of the text.
+    :return:
+    """
+    x, y = pos
+    color = tuple(color)
+    sequence = []
+    for char in text:
+        glyph = render_glyph(font, char, color)
+        sequence.append((glyph, (x, y)))
+        x += glyph.get_width()
+    blit_sequence(surface, sequence)
+
+
 class PopupWindow(Window):
     """
     A popup window is a window that is displayed on top of other windows.
     It is usually used for dialogs, menus, etc.
     """
+    __slots__ = ("_title", "_show_caption", "_dynamic_title", "_caption_text_surf", "_caption_text_key", "_caption_strip_surf",
+                 "_caption_strip_key", "_shadow_surf", "_shadow_key", "_border_surf", "_border_key", "_surfaces_shared")
+
+    # Built (style, surface, shadow surface, shadow key, pixels), by (size, show caption, dynamic title, style id, title,
+    # font), shared by all popup windows, and the number of pixels of the cached surfaces.
+    # The style is kept in the entry so that its id cannot be reused by another style while the entry exists. The font
+    # is part of the key, so that captions rendered before invalidate_font_cache are not used after it.
+    _surface_cache: OrderedDict[tuple, tuple] = OrderedDict()
+    _surface_cache_pixels = 0
 
-    def __init__(self, rect: pg.Rect, title: str = "", show_caption: bool | None = None, visible: bool = True):
+    # Cached surfaces are shared between windows without being copied, so the cache is only used by classes which do
+    # not draw on the surfaces after they are built, nor have a custom draw which may draw on them
+    _use_surface_cache = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._use_surface_cache = (cls._build_surfaces is PopupWindow._build_surfaces
+                                  and cls._compose is PopupWindow._compose and not cls._custom_draw)
+
+    def __init__(self, rect: pg.Rect, title: str = "", show_caption: bool | None = None, visible: bool = True,
+                 dynamic_title: bool = False):
         """
         Initialize the popup window.
         :param rect: The rectangle defining the position and size of the window.
         :param visible: If False, the window will not be drawn or receive events.
+        :param dynamic_title: If True, the title is drawn from cached glyphs instead of being rendered as a whole.
+            Faster for titles which change often (e.g. timers), but the text is not kerned.
         """
         super().__init__(fullscreen=False, rect=rect, visible=visible)
 
-        self.title = title
+        self._title = title
         self._show_caption = show_caption if show_caption is not None else bool(title)
+        self._dynamic_title = dynamic_title
 
-        self._caption_font = self.style.font()
-        self._caption_text_space_needed = self._caption_font.size(self.title)
+        # Rendered title with the (title, font, color) it was rendered with, and caption background and border with the
+        # (width, style) they were drawn for
+        self._caption_text_surf: pg.Surface | None = None
+        self._caption_text_key: tuple | None = None
+        self._caption_strip_surf: pg.Surface | None = None
+        self._caption_strip_key: tuple[int, object] | None = None
 
+        # Shadow and border overlay, with the inputs they were drawn from
         self._shadow_surf: pg.Surface
-        self._build_surfaces()
+        self._shadow_key: tuple | None = None
+        self._border_surf: pg.Surface | None = None
+        self._border_key: tuple | None = None
+        # Set while the surfaces are held by the surface cache, in which case they must not be drawn on
+        self._surfaces_shared = False
+
+    @property
+    def opaque_rect(self) -> pg.Rect | None:
+        style = self.style
+        if self._custom_draw or style.border_radius > 0:
+            return None
+
+        colors = [style.background_color]
+        if style.border_width > 0:
+            colors.append(style.border_color)
+        if self._show_caption:
+            colors.append(style.secondary_background_color)
+            if style.secondary_border_width > 0:
+                colors.append(style.secondary_border_color)
+
+        if all(color.a == 255 for color in colors):
+            return self.rect
+        return None
 
-    def draw_window(self, surface: pg.Surface):
-        surface.blit(self._shadow_surf, (self.rect.x + self.style.shadow_offset[0], self.rect.y + self.style.shadow_offset[1]))
-        surface.blit(self._surface, self.rect.topleft)
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @title.setter
+    def title(self, value: str):
+        self._title = value
+        self._invalidate_surfaces()
 
     def _build_surfaces(self):
-        super()._build_surfaces()
+        style = self.style
+        use_cache = self._use_surface_cache
+        if use_cache:
+            font = style.font() if self._show_caption else None
+            key = (self.rect.size, self._show_caption, self._dynamic_title, id(style), self._title, font)
+            cached = PopupWindow._surface_cache.get(key)
+            if cached is not None:
+                PopupWindow._surface_cache.move_to_end(key)
+                self._surface = cached[1]
+                self._shadow_surf = cached[2]
+                self._shadow_key = cached[3]
+                self._surfaces_shared = True
+                self._dirty = True
+                return
+
+        if self._surfaces_shared:
+            # The surface is held by the cache, a new one is drawn instead of clearing it
+            self._surface = alpha_surface(self._rect.size)
+            self._surfaces_shared = False
+            self._dirty = True
+        else:
+            super()._build_surfaces()
 
-        # Shadow surface
-        shadow_width = self.rect.width + abs(self.style.shadow_offset[0])
-        shadow_height = self.rect.height + abs(self.style.shadow_offset[1])
-        self._shadow_surf = pg.Surface((shadow_width, shadow_height), pg.SRCALPHA)
-        pg.draw.rect(self._shadow_surf, self.style.shadow_color,
-                     (0, 0, self.rect.width, self.rect.height),
-                     border_radius=self.style.border_radius)
+        # Style fields and geometry are bound once, as they are used by most draw calls below
+        background_color, border_color, border_radius, border_width = style.draw_pack
+        shadow_color = style.shadow_color
+        shadow_blur = style.shadow_blur
+        caption_height = style.caption_height
+        width, height = self._rect.size
+        surface = self._surface
+        show_caption = self._show_caption
+
+        # Shadow surface, only drawn again when its inputs changed
+        shadow_key = ((width, height), tuple(shadow_color), shadow_blur, border_radius)
+        if shadow_key != self._shadow_key:
+            # The shadow is extended by the blur radius on each side, so that the blur is not cut
+            shadow_surf = alpha_surface((width + 2 * shadow_blur, height + 2 * shadow_blur))
+            shadow_rect = (shadow_blur, shadow_blur, width, height)
+            # Filling is much faster than drawing a rect, for rects without rounded corners
+            if border_radius == 0:
+                shadow_surf.fill(shadow_color, shadow_rect)
+            else:
+                pg.draw.rect(shadow_surf, shadow_color, shadow_rect, border_radius=border_radius)
+            if shadow_blur > 0:
+                # Transparent pixels take the shadow color, so that the blurred edges are not darkened
+                shadow_surf.fill((*shadow_color[:3], 0), special_flags=pg.BLEND_RGB_MAX)
+                shadow_surf = pg.transform.gaussian_blur(shadow_surf, shadow_blur)
+            self._shadow_surf = shadow_surf
+            self._shadow_key = shadow_key
 
         # Main surface
         # Caption
-        if self._show_caption:
-            text_x = self.style.border_radius
-            text_y = (self.style.caption_height - self._caption_text_space_needed[1]) / 2 + self.style.border_width - 2
+        if show_caption:
+            strip_key = (width, style)
+            if strip_key != self._caption_strip_key:
+                secondary_border_width = style.secondary_border_width
+                strip = alpha_surface((width, caption_height))
+                if border_radius == 0:
+                    strip.fill(style.secondary_background_color)
+                else:
+                    pg.draw.rect(strip, style.secondary_background_color, (0, 0, width, caption_height),
+                                 border_top_left_radius=border_radius, border_top_right_radius=border_radius)
+                if secondary_border_width > 0:
+                    pg.draw.rect(strip, style.secondary_border_color, (0, 0, width, caption_height),
+                                 secondary_border_width,
+                                 border_top_left_radius=border_radius, border_top_right_radius=border_radius)
+                self._caption_strip_surf = strip
+                self._caption_strip_key = strip_key
+
+            # The surface is empty, so taking the maximum copies the strip as is, like drawing it directly would
+            surface.blit(self._caption_strip_surf, (0, 0), special_flags=pg.BLEND_RGBA_MAX)
+
+            font = style.font()
+            text_x = border_radius
+            if self._dynamic_title:
+                text_y = (caption_height - font.get_height()) // 2 + border_width - 2
+                _draw_glyphs(surface, font, self._title, style.foreground_color, (text_x, text_y))
+            else:
+                # The title is only rendered again when its text, font or color changed
+                text_key = (self._title, font, tuple(style.foreground_color))
+                if text_key != self._caption_text_key:
+                    self._caption_text_surf = font.render(self._title, True, style.foreground_color)
+                    self._caption_text_key = text_key
 
-            pg.draw.rect(self._surface, self.style.secondary_background_color, (0, 0, self.rect.width, self.style.caption_height),
-                         border_top_left_radius=self.style.border_radius, border_top_right_radius=self.style.border_radius)
-            if self.style.secondary_border_width > 0:
-                pg.draw.rect(self._surface, self.style.secondary_border_color, (0, 0, self.rect.width, self.style.caption_height),
-                             self.style.secondary_border_width,
-                             border_top_left_radius=self.style.border_radius, border_top_right_radius=self.style.border_radius)
-            self._surface.blit(self._caption_font.render(self.title, True, self.style.foreground_color), (text_x, text_y))
+                text_surf = self._caption_text_surf
+                text_y = (caption_height - text_surf.get_height()) // 2 + border_width - 2
+                surface.blit(text_surf, (text_x, text_y))
 
         # Content and border
-        content_y_offset = self.style.caption_height if self._show_caption else 0
-        content_height = self.rect.height - content_y_offset
-        pg.draw.rect(self._surface, self.style.background_color, (0, content_y_offset, self.rect.width, content_height),
-                     border_top_left_radius=0 if self._show_caption else self.style.border_radius,
-                     border_top_right_radius=0 if self._show_caption else self.style.border_radius,
-                     border_bottom_left_radius=self.style.border_radius,
-                     border_bottom_right_radius=self.style.border_radius)
-        if self.style.border_width > 0:
-            pg.draw.rect(self._surface, self.style.border_color, (0, 0, *self.rect.size), self.style.border_width,
-                         border_radius=self.style.border_radius)
+        content_y_offset = caption_height if show_caption else 0
+        content_height = height - content_y_offset
+        if border_radius == 0:
+            surface.fill(background_color, (0, content_y_offset, width, content_height))
+        else:
+            pg.draw.rect(surface, background_color, (0, content_y_offset, width, content_height),
+                         border_top_left_radius=0 if show_caption else border_radius,
+                         border_top_right_radius=0 if show_caption else border_radius,
+                         border_bottom_left_radius=border_radius,
+                         border_bottom_right_radius=border_radius)
+        if border_width > 0:
+            self._draw_border(border_color, border_radius, border_width)
+
+        if use_cache:
+            self._cache_surfaces(key, style)
+
+    def _cache_surfaces(self, key: tuple, style: Style):
+        """
+        Add the built surfaces to the surface cache, and drop the least recently used entries above the pixel budget.
+        The surfaces are shared from now on, so they are not drawn on again.
+        :param key: key of the surfaces in the cache.
+        :param style: style the surfaces were built with.
+        """
+        width, height = self._surface.get_size()
+        shadow_width, shadow_height = self._shadow_surf.get_size()
+        pixels = width * height + shadow_width * shadow_height
+        if pixels > _SURFACE_CACHE_PIXELS:
+            return
+
+        cache = PopupWindow._surface_cache
+        old = cache.pop(key, None)
+        if old is not None:
+            PopupWindow._surface_cache_pixels -= old[4]
+        cache[key] = (style, self._surface, self._shadow_surf, self._shadow_key, pixels)
+        PopupWindow._surface_cache_pixels += pixels
+        self._surfaces_shared = True
+
+        while PopupWindow._surface_cache_pixels > _SURFACE_CACHE_PIXELS:
+            PopupWindow._surface_cache_pixels -= cache.popitem(last=False)[1][4]
+
+    def _draw_border(self, border_color: pg.Color, border_radius: int, border_width: int):
+        """
+        Draw the border on the main surface.
+        An opaque border is drawn once in an overlay, blitted on later rebuilds with the same inputs. Blitting an opaque
+        overlay replaces pixels like drawing does, which is not the case for translucent borders, drawn directly.
+        """
+        if border_color.a != 255:
+            pg.draw.rect(self._surface, border_color, (0, 0, *self.rect.size), border_width, border_radius=border_radius)
+            return
+
+        border_key = (self.rect.size, tuple(border_color), border_width, border_radius)
+        if border_key != self._border_key:
+            self._border_surf = alpha_surface(self.rect.size)
+            pg.draw.rect(self._border_surf, border_color, (0, 0, *self.rect.size), border_width,
+                         border_radius=border_radius)
+            self._border_key = border_key
+        self._surface.blit(self._border_surf, (0, 0))
+
+    def _compose(self):
+        # The shadow and the window are composited together, so that the window is drawn with a single blit
+        style = self.style
+        width, height = self.rect.size
+        # Position of the shadow surface relative to the window, which is larger than the window when blurred
+        shadow_x = style.shadow_offset[0] - style.shadow_blur
+        shadow_y = style.shadow_offset[1] - style.shadow_blur
+        shadow_width, shadow_height = self._shadow_surf.get_size()
+        left, top = min(shadow_x, 0), min(shadow_y, 0)
+        right, bottom = max(shadow_x + shadow_width, width), max(shadow_y + shadow_height, height)
+
+        self._composed = alpha_surface((right - left, bottom - top))
+        self._composed.blit(self._shadow_surf, (shadow_x - left, shadow_y - top), special_flags=pg.BLEND_RGBA_MAX)
+        self._composed.blit(self._surface, (-left, -top))
+        self._composed_offset = (left, top)
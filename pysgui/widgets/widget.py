@@ -6,11 +6,17 @@ import pygame as pg
 from pysgui.styling import StylableMixin
 from pysgui.util import Constraints
 
+# Constraints are immutable, so widgets without constraints can share the same instance
+_DEFAULT_CONSTRAINTS = Constraints()
+
 
 class Widget(StylableMixin):
     """
     Base class for all widgets. Inherit from this class to create custom widgets.
+    Windows only draw their widgets again when one of them is dirty: subclasses must set dirty whenever their content
+    changes, e.g. when their text or state changes. Style, geometry and visibility changes set it already.
     """
+    __slots__ = ("_on_size_change", "_initrect", "_rect", "_constraints", "_surface", "_visible", "dirty")
 
     def __init__(self, pos: tuple[int, int] | None = None, size: tuple[int, int] = None,
                  constraints: Constraints | None = None, style_name: str = "Widget"):
@@ -22,8 +28,8 @@ class Widget(StylableMixin):
         :param style_name: name of the style to use for this widget. see :class:`StylableMixin` for details.
         """
         super().__init__(style_name)
-        self._on_style_change = self.rebuild
-        self._on_size_change: Callable[[tuple[int, int], tuple[int, int]], None] = lambda _1, _2: self.rebuild()
+        self._on_style_change = self._handle_style_change
+        self._on_size_change: Callable[[tuple[int, int], tuple[int, int]], None] = self._handle_size_change
 
         _pos = pos or (0, 0)
         _size = size
@@ -38,7 +44,14 @@ class Widget(StylableMixin):
 
         self._initrect = None if pos is None or size is None else pg.Rect(pos, size)
         self._rect: pg.Rect = pg.Rect(_pos, _size)
-        self._constraints = constraints or Constraints()
+        self._constraints = constraints or _DEFAULT_CONSTRAINTS
+
+        # Single surface the widget is drawn with, if any, see get_blit
+        self._surface: pg.Surface | None = None
+        self._visible = True
+
+        # Set when the appearance of the widget changed, cleared by the window once the widget is drawn
+        self.dirty = True
 
     def draw(self, surface: pg.Surface, parent_pos: tuple[int, int] = (0, 0)):
         """
@@ -49,6 +62,17 @@ class Widget(StylableMixin):
         """
         pass
 
+    def get_blit(self, parent_pos: tuple[int, int] = (0, 0)) -> tuple[pg.Surface, tuple[int, int]] | None:
+        """
+        Get the (surface, position) pair drawing the widget, so that windows can draw their widgets with a single call.
+        Widgets which are not drawn with a single surface return None, and are drawn with draw instead.
+        :param parent_pos: Position of the parent widget, used for nested widgets.
+        :return: A (surface, position) pair, or None
+        """
+        if self._surface is None:
+            return None
+        return self._surface, (self._rect.x + parent_pos[0], self._rect.y + parent_pos[1])
+
     def handle_event(self, event: pg.Event) -> bool:
         """
         Handle an event. Return True if the event was handled, False otherwise.
@@ -74,6 +98,7 @@ class Widget(StylableMixin):
 
         old_size = self._rect.size
         self._rect = rect
+        self.dirty = True
 
         if old_size != self._rect.size:
             self._on_size_change(old_size, self._rect.size)
@@ -82,9 +107,26 @@ class Widget(StylableMixin):
     def rect(self):
         return self._rect
 
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    @visible.setter
+    def visible(self, value: bool):
+        if value != self._visible:
+            self._visible = value
+            self.dirty = True
+
     def rebuild(self):
         """
         Rebuild the widget, for example when the style or the size changes.
         :return:
         """
         pass
+
+    def _handle_style_change(self):
+        self.dirty = True
+        self.rebuild()
+
+    def _handle_size_change(self, _1: tuple[int, int], _2: tuple[int, int]):
+        self.rebuild()
@@ -1,14 +1,30 @@
 import pygame as pg
 
 from pysgui.styling import StylableMixin
+from pysgui.util import KEYBOARD_EVENTS, MOUSE_EVENTS, alpha_surface, blit_sequence
 from .widget import Widget
 
+# Event types StylableMixin.handle_event may react to
+_STYLE_EVENTS = frozenset({pg.USEREVENT})
+
 
 class Window(StylableMixin):
     """
     A window is a container for widgets. It can be fullscreen or a fixed size.
-    Inherit from this class to create custom windows.
+    Inherit from this class to create custom windows, and override draw_window to customize their appearance.
+    Windows overriding draw or draw_window are drawn every frame, other windows are only drawn again when they changed,
+    see invalidate.
     """
+    __slots__ = ("_rect", "_fullscreen", "visible", "_widgets", "_z_order_reversed", "_widgets_clip", "_focused_widget",
+                 "_surface", "_composed", "_composed_offset", "_dirty", "_surfaces_dirty", "_last_rect", "_damaged",
+                 "_widget_rects", "_removed_widget_rects")
+
+    # Set for subclasses overriding draw or draw_window, which are drawn through them every frame
+    _custom_draw = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._custom_draw = cls.draw is not Window.draw or cls.draw_window is not Window.draw_window
 
     def __init__(self, fullscreen: bool = True, rect: pg.Rect = None, visible: bool = True):
         """
@@ -18,30 +34,150 @@ class Window(StylableMixin):
         :param visible: If False, the window will not be drawn or receive events.
         """
         StylableMixin.__init__(self, "window")
-        self._on_style_change = self._build_surfaces
+        self._on_style_change = self._invalidate_surfaces
 
-        self._rect: pg.Rect = rect if rect else pg.Rect(0, 0, 0, 0)
+        # The rect is copied, as move and resize change it in place
+        self._rect: pg.Rect = pg.Rect(rect) if rect else pg.Rect(0, 0, 0, 0)
         self._fullscreen = fullscreen
         self.visible = visible
-        self.widgets: list[Widget] = []
+        # Widgets in insertion order, and in reverse order, in which they are drawn and receive broadcast events
+        self._widgets: list[Widget] = []
+        self._z_order_reversed: list[Widget] = []
+        # Clip rect of the surface the widgets were last drawn on, positioned events outside it are not sent to widgets
+        self._widgets_clip: pg.Rect | None = None
+        # Widget receiving the keyboard events, set by mouse button presses
+        self._focused_widget: Widget | None = None
+
+        self._surface = alpha_surface(self.rect.size)
 
-        self._surface = pg.Surface(self.rect.size, pg.SRCALPHA)
+        # Composited surface, and its offset relative to the window position
+        self._composed: pg.Surface = self._surface
+        self._composed_offset: tuple[int, int] = (0, 0)
+        self._dirty = True
+        # Set when the surfaces must be built again before composing, so that several changes cause a single rebuild
+        self._surfaces_dirty = True
+
+        # Area of the screen covered by the window when last drawn, see damage
+        self._last_rect: pg.Rect | None = None
+        self._damaged = True
+        # Areas of the screen covered by the widgets when last drawn, and by the widgets removed since. Widgets are
+        # drawn on the screen and may be drawn outside of the window, so they are damaged separately.
+        self._widget_rects: dict[Widget, pg.Rect] = {}
+        self._removed_widget_rects: list[pg.Rect] = []
 
     def add_widget(self, widget: Widget):
-        self.widgets.append(widget)
+        self._widgets.append(widget)
+        self._z_order_reversed.insert(0, widget)
+        self._damaged = True
+
+    def compose(self) -> tuple[pg.Surface, tuple[int, int]]:
+        """
+        Get the composited surface of the window and the position to blit it at.
+        The surface is cached, and only composited again when the window is dirty.
+        Widgets are not part of the composited surface, see draw_widgets.
+        :return: A (surface, position) pair, suitable for Surface.blits.
+        """
+        if self._dirty:
+            if self._surfaces_dirty:
+                self._build_surfaces()
+                self._surfaces_dirty = False
+            self._compose()
+            self._dirty = False
+            self._damaged = True
+
+        return self._composed, (self._rect.x + self._composed_offset[0], self._rect.y + self._composed_offset[1])
+
+    @property
+    def custom_draw(self) -> bool:
+        """
+        True if the class of the window overrides draw or draw_window, in which case it is drawn with draw every frame
+        instead of blitting its composited surface.
+        """
+        return self._custom_draw
+
+    def damage(self) -> list[pg.Rect]:
+        """
+        Get the areas of the screen to update since the last call, because the window was redrawn, moved or hidden, or
+        because some of its widgets are dirty. Windows with a custom draw are damaged on every call.
+        Dirty widgets damage the areas they covered when last drawn and the areas they cover now.
+        :return: The damaged rects, in screen coordinates.
+        """
+        rect = None
+        if self.visible:
+            surface, pos = self.compose()
+            rect = surface.get_rect(topleft=pos)
+
+        window_damaged = rect != self._last_rect or self._damaged or self._custom_draw
+        if not window_damaged and not self._removed_widget_rects and not any(widget.dirty for widget in self._widgets):
+            return []
+
+        rects = self._removed_widget_rects
+        self._removed_widget_rects = []
+        if window_damaged:
+            rects.extend(r for r in (self._last_rect, rect) if r is not None)
+            if rect is not None and rect == self._last_rect:
+                rects.pop()
+
+        widget_rects = self._widget_rects
+        for widget in self._widgets:
+            if not widget.dirty and not window_damaged:
+                continue
+
+            old_rect = widget_rects.pop(widget, None)
+            new_rect = None
+            if rect is not None and widget.visible:
+                blit = widget.get_blit()
+                if blit is not None:
+                    new_rect = pg.Rect(blit[1], blit[0].get_size())
+                else:
+                    # Widgets drawn with draw may draw anywhere on the window
+                    new_rect = widget.rect.union(rect)
+                widget_rects[widget] = new_rect
+
+            if old_rect is not None:
+                rects.append(old_rect)
+            if new_rect is not None and new_rect != old_rect:
+                rects.append(new_rect)
+
+        self._last_rect = rect
+        self._damaged = False
+        return rects
 
     def draw(self, surface: pg.Surface):
         if not self.visible:
             return
 
         self.draw_window(surface)
+        self.draw_widgets(surface)
+
+    def draw_widgets(self, surface: pg.Surface):
+        # Widgets drawn with a single surface are batched, and skipped when that surface is outside the clip rect.
+        # Other widgets may draw anywhere, so they are always drawn, in order between the batches.
+        clip = surface.get_clip()
+        self._widgets_clip = clip
+        sequence = []
+        for widget in self._z_order_reversed:
+            widget.dirty = False
+            if not widget.visible:
+                continue
+
+            blit = widget.get_blit()
+            if blit is not None:
+                if clip.colliderect(blit[1], blit[0].get_size()):
+                    sequence.append(blit)
+            else:
+                blit_sequence(surface, sequence)
+                sequence = []
+                widget.draw(surface)
 
-        for widget in reversed(self.widgets):
-            widget.draw(surface)
+        blit_sequence(surface, sequence)
 
     def draw_window(self, surface: pg.Surface):
-        self._surface.fill(self.style.background_color)
-        surface.blit(self._surface, self.rect.topleft)
+        surface.blit(*self.compose())
+
+    @property
+    def focused_widget(self) -> Widget | None:
+        return self._focused_widget
 
     @property
     def fullscreen(self):
@@ -49,18 +185,44 @@ class Window(StylableMixin):
 
     def handle_event(self, event: pg.Event) -> bool:
         # handle style change
-        StylableMixin.handle_event(self, event)
+        if event.type in _STYLE_EVENTS:
+            StylableMixin.handle_event(self, event)
 
         if not self.visible:
             return False
 
-        for widget in reversed(self.widgets):
+        if event.type in MOUSE_EVENTS:
+            return self._handle_mouse_event(event)
+
+        if event.type in KEYBOARD_EVENTS:
+            focused = self._focused_widget
+            return focused is not None and focused.visible and focused.handle_event(event)
+
+        # Events with a position outside the area the widgets are drawn on are not for them. Other events, such as
+        # user events and timers, are sent to all the widgets.
+        pos = getattr(event, "pos", None)
+        clip = self._widgets_clip
+        if pos is not None and clip is not None and not clip.collidepoint(pos):
+            return False
+
+        for widget in self._z_order_reversed:
             if widget.handle_event(event):
                 return True
         return False
 
+    def invalidate(self):
+        """
+        Compose and draw the window again on the next frame, e.g. when the content it draws changed.
+        """
+        self._dirty = True
+        self._damaged = True
+
+    @property
+    def last_rect(self) -> pg.Rect | None:
+        return self._last_rect
+
     def move(self, pos: tuple[int, int]):
-        self._rect.update(pos, self._rect.size)
+        self._rect.topleft = pos
 
     @property
     def rect(self):
@@ -68,15 +230,109 @@ class Window(StylableMixin):
 
     @rect.setter
     def rect(self, value: pg.Rect):
-        self._rect = value
-        self._build_surfaces()
+        # The rect is copied, as move and resize change it in place
+        self._rect = pg.Rect(value)
+        self._invalidate_surfaces()
+
+    @property
+    def opaque_rect(self) -> pg.Rect | None:
+        """
+        Area of the screen fully covered by opaque pixels of the window, used to skip drawing the windows below it.
+        Windows with a custom draw have no such area, as what they draw is not known.
+        :return: A rect in screen coordinates, or None if the window has no such area.
+        """
+        if self._custom_draw:
+            return None
+        if self.style.background_color.a == 255:
+            return self._rect
+        return None
+
+    def remove_widget(self, widget: Widget):
+        """
+        Remove a widget from the window.
+        :param widget: widget to remove.
+        :raises ValueError: If the widget is not in the window
+        """
+        self._widgets.remove(widget)
+        self._z_order_reversed.remove(widget)
+        self._damaged = True
+        old_rect = self._widget_rects.pop(widget, None)
+        if old_rect is not None:
+            self._removed_widget_rects.append(old_rect)
+        if widget is self._focused_widget:
+            self._focused_widget = None
 
     def resize(self, size: tuple[int, int]):
-        self._rect.update(self._rect.topleft, size)
-        self._build_surfaces()
+        self._rect.size = size
+        self._invalidate_surfaces()
 
     def update(self, dt: float):
         pass
 
+    def widget_at(self, pos: tuple[int, int]) -> Widget | None:
+        """
+        Get the topmost visible widget at a given position. Widgets are drawn in reverse order, so the first widget
+        added is the topmost.
+        :param pos: position, in the coordinates the widgets are drawn in.
+        :return: The widget, or None if there is no widget at this position
+        """
+        # A linear scan rather than a spatial index: widget rects are set by layouts and can be changed in place without
+        # the window knowing, so an index could not be kept up to date without checking every widget anyway
+        clip = self._widgets_clip
+        for widget in self._widgets:
+            if widget.visible and widget.rect.collidepoint(pos) and (clip is None or clip.collidepoint(pos)):
+                return widget
+        return None
+
+    @property
+    def widgets(self) -> list[Widget]:
+        """
+        Widgets of the window, in insertion order. Use add_widget and remove_widget to change them.
+        """
+        return self._widgets
+
+    def _handle_mouse_event(self, event: pg.Event) -> bool:
+        """
+        Send a mouse event to the topmost widget under the pointer, and to the focused widget on button release.
+        :param event: Pygame mouse event to be handled
+        :return: True if the event was handled by any widget, False otherwise
+        """
+        # Mouse wheel events do not carry the pointer position
+        pos = pg.mouse.get_pos() if event.type == pg.MOUSEWHEEL else event.pos
+        target = self.widget_at(pos)
+
+        if event.type == pg.MOUSEBUTTONDOWN:
+            self._focused_widget = target
+
+        handled = target is not None and target.handle_event(event)
+
+        # The widget where the button was pressed is notified of its release, even if the pointer left it
+        focused = self._focused_widget
+        if event.type == pg.MOUSEBUTTONUP and focused is not None and focused is not target and focused.visible:
+            handled = focused.handle_event(event) or handled
+
+        return handled
+
+    def _invalidate_surfaces(self):
+        """
+        Build the surfaces again before the window is next composed.
+        """
+        self._surfaces_dirty = True
+        self._dirty = True
+
     def _build_surfaces(self):
-        self._surface = pg.Surface(self.rect.size, pg.SRCALPHA)
+        # The surface is only allocated again when its size changed, otherwise it is cleared
+        if self._surface.get_size() != self._rect.size:
+            self._surface = alpha_surface(self._rect.size)
+        else:
+            self._surface.fill((0, 0, 0, 0))
+        self._dirty = True
+
+    def _compose(self):
+        """
+        Draw the composited surface of the window. Called by compose when the window is dirty.
+        :return:
+        """
+        self._surface.fill(self.style.background_color)
+        self._composed = self._surface
+        self._composed_offset = (0, 0)
@@ -0,0 +1,49 @@
+import random
+import unittest
+
+import pygame as pg
+
+from pysgui.util import subtract_rects
+
+
+def _pixels(rects: list[pg.Rect]) -> set[tuple[int, int]]:
+    return {(x, y) for rect in rects for x in range(rect.left, rect.right) for y in range(rect.top, rect.bottom)}
+
+
+class SubtractRectsTest(unittest.TestCase):
+
+    def assertDisjoint(self, rects: list[pg.Rect]):
+        for i, rect in enumerate(rects):
+            self.assertTrue(rect.width > 0 and rect.height > 0, rect)
+            for other in rects[i + 1:]:
+                self.assertFalse(rect.colliderect(other), (rect, other))
+
+    def test_no_holes(self):
+        self.assertEqual(subtract_rects(pg.Rect(0, 0, 10, 10), []), [pg.Rect(0, 0, 10, 10)])
+
+    def test_hole_outside(self):
+        self.assertEqual(subtract_rects(pg.Rect(0, 0, 10, 10), [pg.Rect(20, 20, 5, 5)]), [pg.Rect(0, 0, 10, 10)])
+
+    def test_hole_covering(self):
+        self.assertEqual(subtract_rects(pg.Rect(0, 0, 10, 10), [pg.Rect(-5, -5, 20, 20)]), [])
+
+    def test_hole_inside(self):
+        rect, hole = pg.Rect(0, 0, 10, 10), pg.Rect(3, 4, 2, 2)
+        parts = subtract_rects(rect, [hole])
+        self.assertEqual(len(parts), 4)
+        self.assertDisjoint(parts)
+        self.assertEqual(_pixels(parts), _pixels([rect]) - _pixels([hole]))
+
+    def test_random_against_pixels(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            rect = pg.Rect(rng.randint(-5, 5), rng.randint(-5, 5), rng.randint(1, 30), rng.randint(1, 30))
+            holes = [pg.Rect(rng.randint(-10, 30), rng.randint(-10, 30), rng.randint(0, 20), rng.randint(0, 20))
+                     for _ in range(rng.randint(0, 5))]
+            parts = subtract_rects(rect, holes)
+            self.assertDisjoint(parts)
+            self.assertEqual(_pixels(parts), _pixels([rect]) - _pixels(holes))
+
+
+if __name__ == "__main__":
+    unittest.main()
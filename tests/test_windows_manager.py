@@ -0,0 +1,138 @@
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg
+
+from pysgui.core import windows_manager
+from pysgui.core.windows_manager import WindowsManager
+from pysgui.widgets import PopupWindow, Widget, Window
+
+# Styles are not themed in these tests, so windows are drawn with DEFAULT_STYLE
+BACKGROUND = pg.Color(248, 248, 248, 255)
+BLACK = pg.Color(0, 0, 0, 255)
+
+
+class Block(Widget):
+    """Widget drawn from a single surface."""
+
+    def __init__(self, pos: tuple[int, int], size: tuple[int, int] = (10, 10)):
+        super().__init__(pos, size)
+        self._surface = pg.Surface(size)
+        self._surface.fill((255, 0, 0))
+
+
+class Canvas(Window):
+    """Window drawing a circle only, through a custom draw_window."""
+
+    def draw_window(self, surface: pg.Surface):
+        pg.draw.circle(surface, (0, 0, 255), self.rect.center, 5)
+
+
+class WindowsManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        pg.display.init()
+        self.screen = pg.display.set_mode((200, 200))
+        self.manager = WindowsManager(self.screen)
+
+    def tearDown(self):
+        pg.display.quit()
+
+    def drawn_surfaces(self) -> list[pg.Surface]:
+        """Draw the manager, and get the surfaces blitted in batches."""
+        surfaces = []
+        blit_sequence = windows_manager.blit_sequence
+
+        def record(target, sequence):
+            surfaces.extend(surface for surface, _ in sequence)
+            blit_sequence(target, sequence)
+
+        with mock.patch.object(windows_manager, "blit_sequence", record):
+            self.manager.draw()
+        return surfaces
+
+    def test_covered_window_is_skipped(self):
+        below = PopupWindow(pg.Rect(40, 40, 50, 50))
+        self.manager.add(below)
+        above = PopupWindow(pg.Rect(20, 20, 100, 100))
+        self.manager.add(above)
+
+        surfaces = self.drawn_surfaces()
+        self.assertIn(above.compose()[0], surfaces)
+        self.assertNotIn(below.compose()[0], surfaces)
+
+    def test_partially_covered_window_is_drawn(self):
+        below = PopupWindow(pg.Rect(10, 10, 50, 50))
+        self.manager.add(below)
+        self.manager.add(PopupWindow(pg.Rect(40, 40, 100, 100)))
+
+        self.assertIn(below.compose()[0], self.drawn_surfaces())
+        self.assertEqual(self.screen.get_at((15, 15)), BACKGROUND)
+
+    def test_uncovered_area_is_cleared(self):
+        window = PopupWindow(pg.Rect(20, 20, 50, 50))
+        self.manager.add(window)
+        self.manager.draw()
+        self.assertEqual(self.screen.get_at((30, 30)), BACKGROUND)
+
+        self.manager.remove(window)
+        self.assertIn(pg.Rect(20, 20, 50, 50), self.manager.draw())
+        self.assertEqual(self.screen.get_at((30, 30)), BLACK)
+
+    def test_custom_draw_window_does_not_occlude(self):
+        self.manager.add(PopupWindow(pg.Rect(20, 20, 100, 100)))
+        self.manager.add(Canvas(fullscreen=False, rect=pg.Rect(0, 0, 200, 200)))
+
+        self.manager.draw()
+        self.assertEqual(self.screen.get_at((40, 60)), BACKGROUND)
+        self.assertEqual(self.screen.get_at((100, 100)), pg.Color(0, 0, 255))
+
+    def test_idle_frame_has_no_damage(self):
+        self.manager.add(PopupWindow(pg.Rect(20, 20, 100, 100)))
+        self.assertEqual(self.manager.draw(), [pg.Rect(20, 20, 100, 100)])
+        self.assertEqual(self.manager.draw(), [])
+
+    def test_redraw_in_place_damages_rect_once(self):
+        window = PopupWindow(pg.Rect(20, 20, 100, 100))
+        self.manager.add(window)
+        self.manager.draw()
+
+        window.invalidate()
+        self.assertEqual(self.manager.draw(), [pg.Rect(20, 20, 100, 100)])
+
+    def test_move_damages_old_and_new_rects(self):
+        window = PopupWindow(pg.Rect(20, 20, 100, 100))
+        self.manager.add(window)
+        self.manager.draw()
+
+        window.move((30, 40))
+        self.assertEqual(self.manager.draw(), [pg.Rect(20, 20, 100, 100), pg.Rect(30, 40, 100, 100)])
+
+    def test_widget_outside_window_is_damaged(self):
+        window = PopupWindow(pg.Rect(20, 20, 100, 100))
+        widget = Block((150, 150))
+        window.add_widget(widget)
+        self.manager.add(window)
+        self.manager.draw()
+        self.assertEqual(self.screen.get_at((155, 155)), pg.Color(255, 0, 0))
+
+        widget.dirty = True
+        self.assertEqual(self.manager.draw(), [pg.Rect(150, 150, 10, 10)])
+
+        window.remove_widget(widget)
+        self.assertIn(pg.Rect(150, 150, 10, 10), self.manager.draw())
+        self.assertEqual(self.screen.get_at((155, 155)), BLACK)
+
+    def test_expose_damages_screen(self):
+        self.manager.add(PopupWindow(pg.Rect(20, 20, 100, 100)))
+        self.manager.draw()
+
+        self.manager.handle_event(pg.event.Event(pg.WINDOWEXPOSED))
+        self.assertEqual(self.manager.draw(), [pg.Rect(0, 0, 200, 200)])
+
+
+if __name__ == "__main__":
+    unittest.main()